@@ -16,6 +16,7 @@ Usage:
 import sys
 
 try:
+    import numpy as np
     import pandas as pd
     import matplotlib.pyplot as plt
     import matplotlib.dates as mdates
@@ -26,41 +27,53 @@ except ImportError as e:
     print(f"Missing package: {e}")
     sys.exit(1)
 
+# Time range to plot (IST)
+START_TIME = pd.Timestamp('2025-12-15 16:00')
+END_TIME = pd.Timestamp('2025-12-17 00:00')
+
+# Vertical indicator lines; the average delay between them is reported
+INDICATOR_TIME_1 = pd.Timestamp('2025-12-15 19:40')
+INDICATOR_TIME_2 = pd.Timestamp('2025-12-16 20:15')
+
 def parse_csv_and_create_graph(csv_path):
     """
     Process CSV file and create visualization.
     """
-    # Read CSV file
+    # Read CSV file (only the columns we use)
     print(f"Reading CSV file: {csv_path}")
-    df = pd.read_csv(csv_path)
+    df = pd.read_csv(csv_path, usecols=['signupTimestamp', 'Create Date'])
     
     # Display basic info
     print(f"Total records: {len(df)}")
     print(f"Columns: {df.columns.tolist()}")
     
-    # Parse datetime columns
-    df['signupTimestamp'] = pd.to_datetime(df['signupTimestamp'], format='%Y-%m-%d %H:%M', errors='coerce')
-    df['Create Date'] = pd.to_datetime(df['Create Date'], format='%Y-%m-%d %H:%M', errors='coerce')
+    # Parse signupTimestamp first so Create Date is only parsed for rows in range
+    df['signupTimestamp'] = pd.to_datetime(df['signupTimestamp'], format='%Y-%m-%d %H:%M', errors='coerce', cache=True)
     
-    # Remove rows with invalid dates
-    initial_count = len(df)
-    df = df.dropna(subset=['signupTimestamp', 'Create Date'])
-    removed_count = initial_count - len(df)
+    # Report rows with invalid signup dates (the range mask below drops them)
+    removed_count = int(df['signupTimestamp'].isna().sum())
     if removed_count > 0:
-        print(f"Removed {removed_count} rows with invalid dates")
+        print(f"Removed {removed_count} rows with invalid signup dates")
     
-    # Filter data to specified time range: 2025-12-15 16:00 to 2025-12-17 00:00
-    start_time = pd.to_datetime('2025-12-15 16:00', format='%Y-%m-%d %H:%M')
-    end_time = pd.to_datetime('2025-12-17 00:00', format='%Y-%m-%d %H:%M')
-    
-    before_filter = len(df)
-    df = df[(df['signupTimestamp'] >= start_time) & (df['signupTimestamp'] <= end_time)]
+    # Filter data to specified time range: START_TIME to END_TIME
+    # Single mask and copy; NaT signup times fall outside the range
+    before_filter = len(df) - removed_count
+    df = df.loc[df['signupTimestamp'].between(START_TIME, END_TIME)].copy()
     after_filter = len(df)
-    print(f"Filtered to time range {start_time} to {end_time}")
+    print(f"Filtered to time range {START_TIME} to {END_TIME}")
     print(f"Records after filtering: {after_filter} (removed {before_filter - after_filter} records)")
     
+    # Parse Create Date for the remaining rows and drop invalid ones
+    df['Create Date'] = pd.to_datetime(df['Create Date'], format='%Y-%m-%d %H:%M', errors='coerce', cache=True)
+    
+    valid_create = df['Create Date'].notna()
+    removed_count = int((~valid_create).sum())
+    if removed_count > 0:
+        print(f"Removed {removed_count} rows with invalid create dates")
+        df = df.loc[valid_create].copy()
+    
     # Calculate time difference in minutes
-    df['time_diff_minutes'] = (df['Create Date'] - df['signupTimestamp']).dt.total_seconds() / 60
+    df['time_diff_minutes'] = (df['Create Date'].to_numpy() - df['signupTimestamp'].to_numpy()) / np.timedelta64(1, 'm')
     
     # Display statistics
     print(f"\nTime difference statistics:")
@@ -70,25 +83,22 @@ def parse_csv_and_create_graph(csv_path):
     print(f"  Max: {df['time_diff_minutes'].max():.2f} minutes")
     
     # Calculate average delay between indicators
-    indicator_time1 = pd.to_datetime('2025-12-15 19:40', format='%Y-%m-%d %H:%M')
-    indicator_time2 = pd.to_datetime('2025-12-16 20:15', format='%Y-%m-%d %H:%M')
-    
     # Filter data between the two indicators
-    df_between_indicators = df[(df['signupTimestamp'] >= indicator_time1) & (df['signupTimestamp'] <= indicator_time2)]
+    df_between_indicators = df[(df['signupTimestamp'] >= INDICATOR_TIME_1) & (df['signupTimestamp'] <= INDICATOR_TIME_2)]
     
     if len(df_between_indicators) > 0:
         avg_delay_between = df_between_indicators['time_diff_minutes'].mean()
-        print(f"\nAverage delay between indicators ({indicator_time1.strftime('%Y-%m-%d %H:%M')} and {indicator_time2.strftime('%Y-%m-%d %H:%M')}):")
+        print(f"\nAverage delay between indicators ({INDICATOR_TIME_1.strftime('%Y-%m-%d %H:%M')} and {INDICATOR_TIME_2.strftime('%Y-%m-%d %H:%M')}):")
         print(f"  Records: {len(df_between_indicators)}")
         print(f"  Average delay: {avg_delay_between:.2f} minutes")
     else:
-        print(f"\nNo records found between indicators ({indicator_time1.strftime('%Y-%m-%d %H:%M')} and {indicator_time2.strftime('%Y-%m-%d %H:%M')})")
+        print(f"\nNo records found between indicators ({INDICATOR_TIME_1.strftime('%Y-%m-%d %H:%M')} and {INDICATOR_TIME_2.strftime('%Y-%m-%d %H:%M')})")
     
     # Create the plot
     plt.figure(figsize=(14, 8))
     
     # Scatter plot
-    plt.scatter(df['signupTimestamp'], df['time_diff_minutes'], alpha=0.6, s=20)
+    plt.scatter(df['signupTimestamp'], df['time_diff_minutes'], alpha=0.6, s=20, rasterized=True)
     
     # Customize the plot
     plt.xlabel('Signup Time (IST)', fontsize=10)
@@ -99,8 +109,8 @@ def parse_csv_and_create_graph(csv_path):
     # Format x-axis to show dates and hours
     ax = plt.gca()
     
-    # Set x-axis limits to start at 2025-12-15 16:00
-    ax.set_xlim(left=start_time, right=end_time)
+    # Set x-axis limits to the filtered time range
+    ax.set_xlim(left=START_TIME, right=END_TIME)
     
     # Set major ticks every 2 hours
     ax.xaxis.set_major_locator(mdates.HourLocator(interval=2))
@@ -117,9 +127,9 @@ def parse_csv_and_create_graph(csv_path):
     # Add a horizontal line at y=0 for reference
     plt.axhline(y=0, color='r', linestyle='--', alpha=0.5, label='Zero difference')
     
-    # Add vertical indicators at specified times (using the same times as calculated above)
-    plt.axvline(x=indicator_time1, color='blue', linestyle='--', alpha=0.7, linewidth=1.5, label=indicator_time1.strftime('%Y-%m-%d %H:%M'))
-    plt.axvline(x=indicator_time2, color='green', linestyle='--', alpha=0.7, linewidth=1.5, label=indicator_time2.strftime('%Y-%m-%d %H:%M'))
+    # Add vertical indicators at the indicator times
+    plt.axvline(x=INDICATOR_TIME_1, color='blue', linestyle='--', alpha=0.7, linewidth=1.5, label=INDICATOR_TIME_1.strftime('%Y-%m-%d %H:%M'))
+    plt.axvline(x=INDICATOR_TIME_2, color='green', linestyle='--', alpha=0.7, linewidth=1.5, label=INDICATOR_TIME_2.strftime('%Y-%m-%d %H:%M'))
     
     # Add legend
     plt.legend()
@@ -129,7 +139,7 @@ def parse_csv_and_create_graph(csv_path):
     
     # Save the plot
     output_file = csv_path.replace('.csv', '_graph.png')
-    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    plt.savefig(output_file, dpi=150, bbox_inches='tight')
     print(f"\nGraph saved to: {output_file}")
     
     # Close the figure to free memory (comment out plt.show() to avoid displaying)
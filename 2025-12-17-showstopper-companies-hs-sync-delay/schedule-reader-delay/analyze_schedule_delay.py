@@ -11,202 +11,186 @@ Usage:
 """
 
 import argparse
-import json
 import re
-from datetime import datetime, timezone, timedelta
-from collections import defaultdict
+from datetime import timedelta
+from typing import Iterable, Iterator, Tuple
 
+import ijson
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # Headless: plots are only saved to file
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 
 
 # Regex to extract message_id and schedule_timestamp from "Got message" logs
+GOT_MESSAGE_PREFIX = "Got message"
 GOT_MESSAGE_PATTERN = re.compile(
-    r"Got message b?'([^']+)' with schedule_timestamp (\d+\.?\d*)"
+    r"^Got message b?'([^']+)' with schedule_timestamp (\d+\.?\d*)",
+    re.ASCII
 )
 
 
-def parse_asctime(asctime_str: str) -> datetime:
+def parse_asctime(asctime: pd.Series) -> pd.Series:
     """Parse asctime format: '2025-12-15 19:30:00,594'"""
-    # Handle both comma and dot as millisecond separator
-    asctime_str = asctime_str.replace(",", ".")
-    try:
-        return datetime.strptime(asctime_str, "%Y-%m-%d %H:%M:%S.%f")
-    except ValueError:
-        return datetime.strptime(asctime_str, "%Y-%m-%d %H:%M:%S")
+    # With a dot as millisecond separator this is ISO 8601, which pandas
+    # parses in a single C pass (with or without the milliseconds). asctime
+    # values are practically unique, so a parse cache would only add overhead.
+    asctime = asctime.str.replace(",", ".", regex=False)
+    return pd.to_datetime(asctime, format="ISO8601", cache=False)
 
 
-def load_logs(input_file: str) -> list:
-    """Load logs from JSON file."""
-    with open(input_file, "r") as f:
-        return json.load(f)
+def iter_got_messages(input_file: str) -> Iterator[Tuple[str, str, str]]:
+    """
+    Stream logs from JSON file and yield only 'Got message' entries.
+    
+    Yields tuples: (asctime, message_id, schedule_timestamp)
+    """
+    with open(input_file, "rb") as f:
+        for log in ijson.items(f, "item"):
+            asctime = log.get("asctime")
+            if not asctime:
+                continue
+            
+            # Cheap prefix check before running the regex
+            message = log.get("message") or ""
+            if not message.startswith(GOT_MESSAGE_PREFIX):
+                continue
+            
+            match = GOT_MESSAGE_PATTERN.match(message)
+            if not match:
+                continue
+            
+            yield asctime, match.group(1), match.group(2)
 
 
-def extract_got_message_data(logs: list) -> list:
+def extract_got_message_data(records: Iterable[Tuple[str, str, str]]) -> pd.DataFrame:
     """
-    Extract data from 'Got message' logs.
+    Extract data from 'Got message' records (see iter_got_messages).
     
-    Returns list of tuples: (message_id, schedule_timestamp, actual_time, delay_seconds)
+    Returns DataFrame with columns: message_id, scheduled_time, actual_time,
+    delay_seconds, delay_minutes
     """
-    results = []
-    
-    for log in logs:
-        message = log.get("message", "")
-        asctime = log.get("asctime")
-        
-        if not asctime:
-            continue
-        
-        match = GOT_MESSAGE_PATTERN.search(message)
-        if not match:
-            continue
-        
-        message_id = match.group(1)
-        schedule_timestamp = float(match.group(2))
-        
-        # Parse the actual time the log was written (asctime is in UTC)
-        actual_time = parse_asctime(asctime)
-        
-        # Convert schedule_timestamp to datetime (timestamp is in UTC)
-        scheduled_time = datetime.utcfromtimestamp(schedule_timestamp)
-        
-        # Calculate delay in seconds
-        delay_seconds = (actual_time - scheduled_time).total_seconds()
-        
-        results.append({
-            "message_id": message_id,
-            "scheduled_time": scheduled_time,
-            "actual_time": actual_time,
-            "delay_seconds": delay_seconds,
-            "delay_minutes": delay_seconds / 60,
-        })
-    
-    return results
+    df = pd.DataFrame.from_records(records, columns=["asctime", "message_id", "schedule_timestamp"])
+    
+    # Parse the actual time the log was written (asctime is in UTC)
+    actual_time = parse_asctime(df["asctime"])
+    
+    # Convert schedule_timestamp to datetime (timestamp is in UTC); go through
+    # int64 microseconds so the conversion is a single integer pass, rounded
+    # like datetime.utcfromtimestamp
+    schedule_us = (df["schedule_timestamp"].astype("float64") * 1e6).round().astype("int64")
+    scheduled_time = pd.to_datetime(schedule_us, unit="us")
+    
+    # Calculate delay in seconds
+    delay_seconds = (actual_time - scheduled_time).dt.total_seconds()
+    
+    return pd.DataFrame({
+        "message_id": df["message_id"],
+        "scheduled_time": scheduled_time,
+        "actual_time": actual_time,
+        "delay_seconds": delay_seconds,
+        "delay_minutes": delay_seconds / 60,
+    })
 
 
-def deduplicate_by_message_id(data: list) -> list:
+def deduplicate_by_message_id(data: pd.DataFrame) -> pd.DataFrame:
     """
     Keep only the first occurrence of each message_id.
     
     The scheduler may log the same message multiple times if it's still
     in the queue being processed by different instances.
     """
-    seen = {}
-    for entry in data:
-        msg_id = entry["message_id"]
-        if msg_id not in seen:
-            seen[msg_id] = entry
-    
-    return list(seen.values())
+    return data.drop_duplicates(subset="message_id", keep="first")
 
 
-def filter_valid_delays(data: list) -> list:
+def filter_valid_delays(data: pd.DataFrame) -> pd.DataFrame:
     """
     Filter out entries with negative delays (future scheduled messages)
     or unreasonably large delays (data issues).
     """
-    valid = []
-    skipped_future = 0
-    skipped_large = 0
-    
-    for entry in data:
-        delay = entry["delay_seconds"]
-        
-        # Skip messages scheduled for the future (negative delay)
-        if delay < 0:
-            skipped_future += 1
-            continue
-        
-        # Skip unreasonably large delays (more than 7 days - likely data issues)
-        if delay > 7 * 24 * 60 * 60:
-            skipped_large += 1
-            continue
-        
-        valid.append(entry)
+    delay = data["delay_seconds"]
+    
+    # Skip messages scheduled for the future (negative delay)
+    future = delay < 0
+    
+    # Skip unreasonably large delays (more than 7 days - likely data issues)
+    large = delay > 7 * 24 * 60 * 60
+    
+    skipped_future = int(future.sum())
+    skipped_large = int(large.sum())
     
     if skipped_future > 0:
         print(f"Skipped {skipped_future} messages scheduled for the future")
     if skipped_large > 0:
         print(f"Skipped {skipped_large} messages with unreasonably large delays (>7 days)")
     
-    return valid
+    return data[~(future | large)]
 
 
-def print_statistics(data: list):
+def print_statistics(data: pd.DataFrame):
     """Print summary statistics."""
-    if not data:
+    if data.empty:
         print("No data to analyze.")
         return
     
-    delays = [d["delay_minutes"] for d in data]
+    delays = data["delay_minutes"].to_numpy(dtype=np.float64)
     
     print("\n" + "=" * 60)
     print("SCHEDULING DELAY STATISTICS")
     print("=" * 60)
     print(f"Total messages analyzed: {len(data)}")
     print(f"\nDelay (in minutes):")
-    print(f"  Min:    {min(delays):.2f}")
-    print(f"  Max:    {max(delays):.2f}")
-    print(f"  Mean:   {sum(delays) / len(delays):.2f}")
+    print(f"  Min:    {delays.min():.2f}")
+    print(f"  Max:    {delays.max():.2f}")
+    print(f"  Mean:   {delays.mean():.2f}")
     
-    sorted_delays = sorted(delays)
-    p50 = sorted_delays[len(sorted_delays) // 2]
-    p90 = sorted_delays[int(len(sorted_delays) * 0.9)]
-    p99 = sorted_delays[int(len(sorted_delays) * 0.99)]
+    # Partial sort: only the percentile positions need to be in place
+    percentile_idx = [len(delays) // 2, int(len(delays) * 0.9), int(len(delays) * 0.99)]
+    p50, p90, p99 = np.partition(delays, percentile_idx)[percentile_idx]
     
     print(f"  Median (p50): {p50:.2f}")
     print(f"  p90:    {p90:.2f}")
     print(f"  p99:    {p99:.2f}")
     
     # Time range
-    times = [d["actual_time"] for d in data]
+    times = data["actual_time"]
     print(f"\nTime range:")
-    print(f"  First: {min(times)}")
-    print(f"  Last:  {max(times)}")
-    
-    # Bucket by delay ranges
-    buckets = defaultdict(int)
-    for delay in delays:
-        if delay < 1:
-            buckets["< 1 min"] += 1
-        elif delay < 5:
-            buckets["1-5 min"] += 1
-        elif delay < 15:
-            buckets["5-15 min"] += 1
-        elif delay < 60:
-            buckets["15-60 min"] += 1
-        elif delay < 360:
-            buckets["1-6 hours"] += 1
-        else:
-            buckets["> 6 hours"] += 1
+    print(f"  First: {times.min()}")
+    print(f"  Last:  {times.max()}")
+    
+    # Bucket by delay ranges (edges in minutes)
+    bucket_edges = [1, 5, 15, 60, 360]
+    bucket_labels = ["< 1 min", "1-5 min", "5-15 min", "15-60 min", "1-6 hours", "> 6 hours"]
+    bucket_counts = np.bincount(np.digitize(delays, bucket_edges), minlength=len(bucket_labels))
     
     print("\nDelay distribution:")
-    for bucket in ["< 1 min", "1-5 min", "5-15 min", "15-60 min", "1-6 hours", "> 6 hours"]:
-        count = buckets.get(bucket, 0)
+    for bucket, count in zip(bucket_labels, bucket_counts):
         pct = count / len(delays) * 100
         bar = "█" * int(pct / 2)
         print(f"  {bucket:12s}: {count:6d} ({pct:5.1f}%) {bar}")
 
 
-def plot_delay_over_time(data: list, output_file: str = "schedule_delay_plot.png"):
+def plot_delay_over_time(data: pd.DataFrame, output_file: str = "schedule_delay_plot.png"):
     """Create a plot of delay over time."""
-    if not data:
+    if data.empty:
         print("No data to plot.")
         return
     
     # Sort by actual time
-    sorted_data = sorted(data, key=lambda x: x["scheduled_time"])
+    sorted_data = data.sort_values("scheduled_time")
     
     # Convert times to IST (UTC+2) for display
     IST_OFFSET = timedelta(hours=2)
-    times = [d["scheduled_time"] + IST_OFFSET for d in sorted_data]
-    delays = [d["delay_minutes"] for d in sorted_data]
+    times = sorted_data["scheduled_time"] + IST_OFFSET
+    delays = sorted_data["delay_minutes"]
     
     # Create figure with single plot
     fig, ax = plt.subplots(figsize=(14, 6))
     
     # Scatter plot of delay over time
-    ax.scatter(times, delays, alpha=0.5, s=10, c='blue')
+    ax.scatter(times, delays, alpha=0.5, s=10, c='blue', rasterized=True)
     ax.set_xlabel("Scheduled Time (IST)")
     ax.set_ylabel("Delay (minutes)")
     ax.set_title("Scheduling Delay Over Scheduled Time")
@@ -215,15 +199,16 @@ def plot_delay_over_time(data: list, output_file: str = "schedule_delay_plot.png
     plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
     ax.grid(True, alpha=0.3)
     
-    # Add a line connecting the points
-    ax.plot(times, delays, color='red', linewidth=1, alpha=0.7)
+    # Add a trend line: median delay per 5-minute bin
+    trend = pd.Series(delays.to_numpy(), index=pd.DatetimeIndex(times)).resample("5min").median()
+    ax.plot(trend.index, trend.to_numpy(), color='red', linewidth=1, alpha=0.7)
     
     plt.tight_layout()
     plt.savefig(output_file, dpi=150)
     print(f"\nPlot saved to: {output_file}")
     
-    # Also show the plot
-    plt.show()
+    # Close the figure to free memory
+    plt.close(fig)
 
 
 def main():
@@ -248,12 +233,9 @@ def main():
     
     args = parser.parse_args()
     
+    # Stream "Got message" logs from the input file
     print(f"Loading logs from: {args.input}")
-    logs = load_logs(args.input)
-    print(f"Loaded {len(logs)} log entries")
-    
-    # Extract data from "Got message" logs
-    data = extract_got_message_data(logs)
+    data = extract_got_message_data(iter_got_messages(args.input))
     print(f"Found {len(data)} 'Got message' entries")
     
     # Deduplicate by message_id
@@ -10,14 +10,14 @@ Output:
 """
 
 import argparse
-import json
-import requests
-import urllib3
+import asyncio
+import base64
+import sys
+import aiohttp
+import orjson
+from collections import Counter
 from datetime import datetime, timedelta
 
-# Suppress SSL warnings for self-signed certificates
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
 # Configuration
 ELASTICSEARCH_URL = "https://app.prod.connecteam.com:9000/elastic/internal/search/es"
 INDEX_PATTERN = "matrix-logs*"
@@ -30,8 +30,23 @@ END_TIME = "2025-12-16T18:30:00Z"
 # Service to filter
 SERVICE_NAME = "schedule_pubsub_reader"
 
-# Batch size for pagination (keep under 10000 to avoid ES limit)
-BATCH_SIZE = 5000
+# Batch size for pagination (ES caps a single page at 10000 hits)
+BATCH_SIZE = 10000
+
+# from/size pagination can't go past this many hits (ES index.max_result_window)
+MAX_RESULT_WINDOW = 10000
+
+# Max number of time windows fetched concurrently
+MAX_CONCURRENT_WINDOWS = 8
+
+# HTTP statuses that mean the query or credentials are wrong (no retry helps)
+FATAL_STATUSES = {400, 401, 403, 404}
+
+# Transient HTTP statuses (timeouts, throttling, server errors) are retried
+# with exponential backoff before the window gives up
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+MAX_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 1
 
 # Sampling configuration
 # To get ~5% sample spread over time: fetch 3 minutes every hour or 30 seconds every 10 minutes
@@ -39,6 +54,10 @@ SAMPLE_INTERVAL = timedelta(minutes=10)  # How often to sample
 SAMPLE_DURATION = timedelta(seconds=30)  # How much to fetch each sample
 
 
+class QueryRejectedError(Exception):
+    """Elasticsearch permanently rejected the query (HTTP 400/401/403/404)."""
+
+
 def parse_time(time_str: str) -> datetime:
     """Parse ISO format time string."""
     # Handle both with and without Z suffix
@@ -78,9 +97,14 @@ def generate_time_windows(start: datetime, end: datetime, interval: timedelta, d
     return windows
 
 
-def build_query(start_time: str, end_time: str, from_offset: int = 0):
-    """Build the Elasticsearch query with time range and pagination offset."""
-    return {
+def build_query(start_time: str, end_time: str, search_after: list = None, from_offset: int = None):
+    """
+    Build the Elasticsearch query with time range and pagination.
+    
+    Pages with search_after by default; passing from_offset builds a
+    from/size query instead (fallback for clusters that reject the _id sort).
+    """
+    query = {
         "params": {
             "index": INDEX_PATTERN,
             "body": {
@@ -110,8 +134,13 @@ def build_query(start_time: str, end_time: str, from_offset: int = 0):
                         ]
                     }
                 },
+                # _id breaks ties between logs with the same @timestamp.
+                # Sorting on _id needs fielddata on _id, which ES 8 disables by
+                # default (indices.id_field_data.enabled); such a cluster
+                # answers HTTP 400 and the window falls back to from/size
                 "sort": [
-                    {"@timestamp": {"order": "asc"}}
+                    {"@timestamp": {"order": "asc"}},
+                    {"_id": {"order": "asc"}}
                 ],
                 "_source": [
                     "@timestamp",
@@ -122,11 +151,19 @@ def build_query(start_time: str, end_time: str, from_offset: int = 0):
                     "ct_deployment",
                     "json.extra"
                 ],
-                "from": from_offset,
                 "size": BATCH_SIZE
             }
         }
     }
+    
+    body = query["params"]["body"]
+    if from_offset is not None:
+        body["sort"] = [{"@timestamp": {"order": "asc"}}]
+        body["from"] = from_offset
+    elif search_after is not None:
+        body["search_after"] = search_after
+    
+    return query
 
 
 def extract_log_entry(hit: dict) -> dict:
@@ -157,35 +194,65 @@ def extract_log_entry(hit: dict) -> dict:
         }
 
 
-def fetch_logs_for_window(
-    username: str, 
-    password: str, 
+async def fetch_logs_for_window(
+    session: aiohttp.ClientSession,
     start_time: str, 
-    end_time: str,
-    headers: dict
+    end_time: str
 ) -> list:
-    """Fetch all logs for a specific time window using from/size pagination."""
+    """
+    Fetch all logs for a specific time window using search_after pagination.
+    
+    Falls back to from/size (capped at MAX_RESULT_WINDOW hits) if the cluster
+    rejects the search_after sort.
+    """
     logs = []
-    from_offset = 0
-    page = 1
+    search_after = None
+    from_offset = None  # Set once the window falls back to from/size
+    attempt = 0
     
     while True:
-        query = build_query(start_time, end_time, from_offset)
+        query = build_query(start_time, end_time, search_after, from_offset)
         
-        response = requests.post(
-            ELASTICSEARCH_URL,
-            auth=(username, password),
-            headers=headers,
-            json=query,
-            verify=False
-        )
+        try:
+            async with session.post(ELASTICSEARCH_URL, json=query) as response:
+                status = response.status
+                if status == 200:
+                    result = await response.json(loads=orjson.loads)
+                else:
+                    text = await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # Keep whatever this window fetched so far; other windows carry on
+            print(f"    Error in window {start_time} to {end_time}: {e!r}")
+            break
         
-        if response.status_code != 200:
-            print(f"    Error: HTTP {response.status_code}")
-            print(f"    {response.text[:500]}")
+        if status == 400 and from_offset is None:
+            # Most likely the _id tiebreaker (no _id fielddata); redo the
+            # window with plain from/size paging
+            print(f"    search_after query rejected in window {start_time} to {end_time} (HTTP 400), falling back to from/size")
+            logs = []
+            search_after = None
+            from_offset = 0
+            continue
+        
+        if status in FATAL_STATUSES:
+            raise QueryRejectedError(
+                f"Query rejected for window {start_time} to {end_time}: "
+                f"HTTP {status}\n{text[:500]}"
+            )
+        
+        if status in RETRY_STATUSES and attempt < MAX_RETRIES:
+            delay = RETRY_BACKOFF_SECONDS * 2 ** attempt
+            attempt += 1
+            print(f"    HTTP {status} in window {start_time} to {end_time}, retrying in {delay}s ({attempt}/{MAX_RETRIES})")
+            await asyncio.sleep(delay)
+            continue
+        
+        if status != 200:
+            print(f"    Error in window {start_time} to {end_time}: HTTP {status}")
+            print(f"    {text[:500]}")
             break
         
-        result = response.json()
+        attempt = 0
         
         # Handle the nested response structure from Kibana proxy
         if "rawResponse" in result:
@@ -194,15 +261,6 @@ def fetch_logs_for_window(
             hits_data = result.get("hits", {})
         
         hits = hits_data.get("hits", [])
-        total = hits_data.get("total", {})
-        
-        if isinstance(total, dict):
-            total_count = total.get("value", 0)
-        else:
-            total_count = total
-        
-        if page == 1 and total_count > 0:
-            print(f"    Total in window: {total_count}")
         
         if not hits:
             break
@@ -211,27 +269,31 @@ def fetch_logs_for_window(
         for hit in hits:
             logs.append(extract_log_entry(hit))
         
-        # Update offset for next page
-        from_offset += len(hits)
-        page += 1
-        
         # Check if we've fetched all logs in this window
         if len(hits) < BATCH_SIZE:
             break
         
-        # Safety check: don't exceed total count or ES limit
-        if from_offset >= total_count or from_offset >= 10000:
-            if from_offset >= 10000 and total_count > 10000:
-                print(f"    Warning: Hit ES 10k limit, {total_count - from_offset} logs may be missed in this window")
+        if from_offset is None:
+            # Continue after the sort values of the last hit
+            search_after = hits[-1]["sort"]
+            continue
+        
+        from_offset += len(hits)
+        if from_offset >= MAX_RESULT_WINDOW:
+            total = hits_data.get("total", {})
+            total_count = total.get("value", 0) if isinstance(total, dict) else total
+            if total_count > from_offset:
+                print(f"    Warning: Hit ES {MAX_RESULT_WINDOW} limit, {total_count - from_offset} logs may be missed in window {start_time} to {end_time}")
             break
     
     return logs
 
 
-def fetch_logs(username: str, password: str) -> list:
-    """Fetch all logs using hourly time windows + from/size pagination."""
-    all_logs = []
+async def fetch_logs(username: str, password: str) -> list:
+    """Fetch all logs using sampled time windows, several windows at a time."""
+    credentials = base64.b64encode(f"{username}:{password}".encode()).decode()
     headers = {
+        "Authorization": f"Basic {credentials}",
         "Content-Type": "application/json",
         "kbn-xsrf": "true"
     }
@@ -247,29 +309,52 @@ def fetch_logs(username: str, password: str) -> list:
     print(f"Fetching logs from {START_TIME} to {END_TIME}")
     print(f"Service: {SERVICE_NAME}")
     print(f"Sampling: {SAMPLE_DURATION} every {SAMPLE_INTERVAL} (~{sample_pct:.1f}% of data)")
-    print(f"Split into {len(windows)} sample windows")
+    print(f"Split into {len(windows)} sample windows ({MAX_CONCURRENT_WINDOWS} at a time)")
     print("=" * 60)
     
-    for i, (window_start, window_end) in enumerate(windows, 1):
+    done = 0
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_WINDOWS)
+    
+    async def fetch_window(session: aiohttp.ClientSession, window_start: datetime, window_end: datetime) -> list:
+        nonlocal done
         start_str = format_time(window_start)
         end_str = format_time(window_end)
         
-        print(f"\n[{i}/{len(windows)}] Window: {start_str} to {end_str}")
-        
-        window_logs = fetch_logs_for_window(
-            username, password, start_str, end_str, headers
-        )
+        # Only MAX_CONCURRENT_WINDOWS windows run at once, so a window's
+        # requests (and their timeouts) start only when it gets a slot
+        async with semaphore:
+            window_logs = await fetch_logs_for_window(session, start_str, end_str)
         
-        all_logs.extend(window_logs)
-        print(f"    Fetched {len(window_logs)} logs (total so far: {len(all_logs)})")
+        done += 1
+        print(f"[{done}/{len(windows)}] Window: {start_str} to {end_str} - fetched {len(window_logs)} logs")
+        return window_logs
     
+    # The semaphore caps how many windows are in flight; the connector limit
+    # is a backstop on open sockets. Pagination within a window stays sequential
+    connector = aiohttp.TCPConnector(limit=MAX_CONCURRENT_WINDOWS, ssl=False)
+    async with aiohttp.ClientSession(connector=connector, headers=headers) as session:
+        tasks = [
+            asyncio.ensure_future(fetch_window(session, window_start, window_end))
+            for window_start, window_end in windows
+        ]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            # Stop the remaining windows before the session closes under them
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+    
+    # gather() keeps window order, so logs stay sorted by window
+    all_logs = [log for window_logs in results for log in window_logs]
     return all_logs
 
 
 def save_logs(logs: list, output_file: str):
     """Save logs to a JSON file."""
-    with open(output_file, "w") as f:
-        json.dump(logs, f, indent=2)
+    with open(output_file, "wb") as f:
+        f.write(orjson.dumps(logs, option=orjson.OPT_INDENT_2))
     print(f"\nSaved {len(logs)} logs to {output_file}")
 
 
@@ -285,20 +370,14 @@ def print_summary(logs: list):
     print(f"Total logs: {len(logs)}")
     
     # Count by level
-    levels = {}
-    for log in logs:
-        level = log.get("level", "UNKNOWN")
-        levels[level] = levels.get(level, 0) + 1
+    levels = Counter(log.get("level", "UNKNOWN") for log in logs)
     
     print("\nBy log level:")
     for level, count in sorted(levels.items(), key=lambda x: -x[1]):
         print(f"  {level}: {count}")
     
     # Count by deployment
-    deployments = {}
-    for log in logs:
-        deployment = log.get("deployment", "UNKNOWN")
-        deployments[deployment] = deployments.get(deployment, 0) + 1
+    deployments = Counter(log.get("deployment", "UNKNOWN") for log in logs)
     
     print("\nBy deployment:")
     for deployment, count in sorted(deployments.items(), key=lambda x: -x[1]):
@@ -320,7 +399,12 @@ def main():
     
     args = parser.parse_args()
     
-    logs = fetch_logs(args.username, args.password)
+    try:
+        logs = asyncio.run(fetch_logs(args.username, args.password))
+    except QueryRejectedError as e:
+        print(f"\nError: {e}")
+        sys.exit(1)
+    
     save_logs(logs, args.output)
     print_summary(logs)
 
@@ -9,6 +9,11 @@ Filters out:
 """
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pa_csv
+import matplotlib
+matplotlib.use("Agg")  # Headless: plots are only saved to file
 import matplotlib.pyplot as plt
 from pathlib import Path
 from datetime import datetime, timedelta
@@ -19,51 +24,71 @@ OUTPUT_FILE = Path(__file__).parent / "companies_by_date_histogram.png"
 
 DAYS_BACK = 200
 
+# Size of each block read from the CSV; only filtered rows are kept between blocks
+CHUNK_BYTES = 64 * 1024 * 1024
+
 
 def load_and_filter_companies(filepath: Path) -> pd.DataFrame:
     """Load CSV and apply filters to exclude test/invalid companies."""
-    df = pd.read_csv(filepath)
+    # Stream the CSV in blocks, reading only the columns we need; each block
+    # is filtered with Arrow kernels and only surviving rows are kept
+    reader = pa_csv.open_csv(
+        filepath,
+        read_options=pa_csv.ReadOptions(block_size=CHUNK_BYTES),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=["Company name", "Create Date"],
+            column_types={"Company name": pa.string(), "Create Date": pa.timestamp("s")},
+            timestamp_parsers=["%Y-%m-%d %H:%M"],
+        ),
+    )
+    
+    excluded_names = pa.array(["company", "test", "0"])
+    start_date = datetime.now() - timedelta(days=DAYS_BACK)
     
-    original_count = len(df)
-    print(f"Total companies loaded: {original_count:,}")
+    original_count = after_empty = after_exact = after_automation = after_date_filter = 0
+    batches = []
+    
+    for batch in reader:
+        original_count += batch.num_rows
+        
+        # Trim and lowercase the names once; all name filters below reuse it
+        name = pc.utf8_lower(pc.utf8_trim_whitespace(pc.fill_null(batch.column("Company name"), "")))
+        
+        # Filter out empty names
+        keep = pc.not_equal(name, "")
+        after_empty += pc.sum(keep).as_py() or 0
+        
+        # Filter out exact matches: "company", "test", "0" (case-insensitive)
+        keep = pc.and_(keep, pc.invert(pc.is_in(name, value_set=excluded_names)))
+        after_exact += pc.sum(keep).as_py() or 0
+        
+        # Filter out names containing "automation" (case-insensitive)
+        keep = pc.and_(keep, pc.invert(pc.match_substring(name, "automation")))
+        after_automation += pc.sum(keep).as_py() or 0
+        
+        # Filter for companies created in the last year only
+        keep = pc.and_(keep, pc.greater_equal(batch.column("Create Date"), start_date))
+        after_date_filter += pc.sum(keep).as_py() or 0
+        
+        batches.append(batch.filter(keep))
     
-    # Filter out empty names
-    df = df[df["Company name"].notna() & (df["Company name"].str.strip() != "")]
-    after_empty = len(df)
+    print(f"Total companies loaded: {original_count:,}")
     print(f"After removing empty names: {after_empty:,} (removed {original_count - after_empty:,})")
-    
-    # Filter out exact matches: "company", "test", "0" (case-insensitive)
-    excluded_names = {"company", "test", "0"}
-    df = df[~df["Company name"].str.lower().str.strip().isin(excluded_names)]
-    after_exact = len(df)
     print(f"After removing 'company', 'test', '0': {after_exact:,} (removed {after_empty - after_exact:,})")
-    
-    # Filter out names containing "automation" (case-insensitive)
-    df = df[~df["Company name"].str.lower().str.contains("automation", na=False)]
-    after_automation = len(df)
     print(f"After removing 'automation' names: {after_automation:,} (removed {after_exact - after_automation:,})")
-    
-    # Filter for companies created in the last year only
-    df["Create Date"] = pd.to_datetime(df["Create Date"])
-    start_date = datetime.now() - timedelta(days=DAYS_BACK)
-    df = df[df["Create Date"] >= start_date]
-    after_date_filter = len(df)
     print(f"After filtering to last {DAYS_BACK} days: {after_date_filter:,} (removed {after_automation - after_date_filter:,})")
     
     print(f"\nFinal count: {after_date_filter:,} companies ({after_date_filter/original_count*100:.1f}% of original)")
     
-    return df
+    return pa.Table.from_batches(batches, schema=reader.schema).to_pandas()
 
 
 def create_histogram(df: pd.DataFrame, output_path: Path):
     """Create and save histogram of companies by creation date."""
-    # Extract just the date part (Create Date already parsed in filter step)
-    df["Date"] = df["Create Date"].dt.date
-    
-    # Count companies per day
-    daily_counts = df.groupby("Date").size().reset_index(name="Count")
-    daily_counts["Date"] = pd.to_datetime(daily_counts["Date"])
-    daily_counts = daily_counts.sort_values("Date")
+    # Count companies per day (Create Date already parsed in filter step),
+    # keeping only days that had signups
+    daily_counts = df.set_index("Create Date").resample("D").size()
+    daily_counts = daily_counts[daily_counts > 0].rename_axis("Date").reset_index(name="Count")
     
     print(f"\nDate range: {daily_counts['Date'].min().date()} to {daily_counts['Date'].max().date()}")
     print(f"Total days with signups: {len(daily_counts)}")
@@ -90,7 +115,8 @@ def create_histogram(df: pd.DataFrame, output_path: Path):
     plt.savefig(output_path, dpi=150, bbox_inches="tight")
     print(f"\nHistogram saved to: {output_path}")
     
-    plt.show()
+    # Close the figure to free memory
+    plt.close(fig)
 
 
 def main():